@@ -1,9 +1,28 @@
 from flask import Flask, render_template, request, send_file
 import tabula
+# tabula-py only runs tabula-java in-process, reusing one JVM, when jpype is
+# importable; without it tabula silently spawns a java subprocess per call, so
+# it is imported here to fail at startup instead
+import jpype  # noqa: F401
 import pandas as pd
+import numpy as np
+import io
 import os
+import re
+import multiprocessing
+import threading
+import xlsxwriter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
 from werkzeug.utils import secure_filename
 
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; without it parse_money always uses the pandas path
+    njit = None
+
 app = Flask(__name__)
 
 # Configure upload folder
@@ -14,26 +33,124 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 # Create uploads folder if it doesn't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Statements are converted in worker processes, so concurrent uploads run on
+# separate cores instead of sharing the GIL in the server's request threads,
+# and each worker keeps its own JVM warm between uploads. Every worker holds a
+# whole JVM, so the pool size is explicit rather than one per CPU.
+app.config['CONVERTER_WORKERS'] = int(os.environ.get('CONVERTER_WORKERS', 2))
+
+# The worker pool is created on first use (see get_converter) and replaced if
+# a worker dies, which would otherwise leave it unusable
+converter = None
+converter_lock = threading.Lock()
+
+# Transaction rows carry a dd.mm.yyyy date; compiled once at import
+DATE_PATTERN = re.compile(r'\d{2}\.\d{2}\.\d{4}')
+
+# Monetary columns and the characters stripped from them before conversion
+MONEY_COLUMNS = ['Money Out', 'Money In', 'Ledger Balance']
+MONEY_STRIP = str.maketrans('', '', '$,')
+
+# Columns at least this long are parsed with the numba parser when it is
+# installed. Once compiled it takes about half the time of the pandas path per
+# column at this size, but the first large statement each worker handles pays
+# the compile (or on-disk cache load, ~0.1-0.6s), and importing numba adds
+# ~0.4s to every worker's start-up, so the saving only shows up across
+# repeated large statements
+NUMBA_MIN_ROWS = 10000
+
+# Excel cell formats, turned into workbook formats by write_report
+FORMAT_SPECS = {
+    'money': {
+        'num_format': '#,##0.00',
+        'align': 'right'
+    },
+    'percentage': {
+        'num_format': '0.0"%"',
+        'align': 'right'
+    },
+    'date': {
+        'num_format': 'dd/mm/yyyy',
+        'align': 'center'
+    },
+    'header': {
+        'bold': True,
+        'bg_color': '#4F81BD',
+        'font_color': 'white',
+        'border': 1,
+        'align': 'center',
+        'valign': 'vcenter'
+    },
+    'monthly': {
+        'bold': True,
+        'bg_color': '#DCE6F1',
+        'border': 1,
+        'num_format': '#,##0.00'
+    },
+    'grand_total': {
+        'bold': True,
+        'bg_color': '#4F81BD',
+        'font_color': 'white',
+        'border': 1,
+        'num_format': '#,##0.00'
+    },
+    'text': {
+        'align': 'left',
+        'valign': 'vcenter',
+        'text_wrap': True
+    },
+    'positive': {
+        'font_color': 'green',
+        'num_format': '#,##0.00'
+    },
+    'negative': {
+        'font_color': 'red',
+        'num_format': '#,##0.00'
+    }
+}
+
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def create_summary(df):
+def aggregate_daily(df):
+    """Aggregate the transaction data per day in a single groupby pass"""
+    # The summary, daily and monthly sheets are all derived from this frame,
+    # so the transactions themselves are only scanned once for totals
+    return df.groupby('Transaction Date', sort=True).agg({
+        'Money In': 'sum',
+        'Money Out': 'sum',
+        'Transaction Details': 'count'  # Count of transactions per day
+    })
+
+
+def create_summary(df, daily):
     """Create summary statistics from the transaction data"""
+    total_in = daily['Money In'].sum()
+    total_out = daily['Money Out'].sum()
+
+    # Work on the raw arrays and reuse the totals for the averages, so each
+    # money column is only scanned for its count and its extreme value
+    money_in = df['Money In'].to_numpy()
+    money_out = df['Money Out'].to_numpy()
+    incoming = np.count_nonzero(~np.isnan(money_in))
+    outgoing = np.count_nonzero(~np.isnan(money_out))
+
     summary = {
-        'Total Money In': df['Money In'].sum(),
-        'Total Money Out': df['Money Out'].sum(),
-        'Net Movement': df['Money In'].sum() + df['Money Out'].sum(),  # Changed: just add Money Out
+        'Total Money In': total_in,
+        'Total Money Out': total_out,
+        'Net Movement': total_in + total_out,  # Changed: just add Money Out
         'Number of Transactions': len(df),
-        'Number of Incoming Transactions': df['Money In'].notna().sum(),
-        'Number of Outgoing Transactions': df['Money Out'].notna().sum(),
-        'Average Transaction In': df['Money In'].mean(),
-        'Average Transaction Out': df['Money Out'].mean(),
-        'Largest Transaction In': df['Money In'].max(),
-        'Largest Transaction Out': df['Money Out'].min(),  # Changed: use min since it's the most negative
-        'First Transaction Date': df['Transaction Date'].iloc[0],
-        'Last Transaction Date': df['Transaction Date'].iloc[-1],
+        'Number of Incoming Transactions': incoming,
+        'Number of Outgoing Transactions': outgoing,
+        'Average Transaction In': total_in / incoming if incoming else np.nan,
+        'Average Transaction Out': total_out / outgoing if outgoing else np.nan,
+        'Largest Transaction In': np.nanmax(money_in) if incoming else np.nan,
+        'Largest Transaction Out': np.nanmin(money_out) if outgoing else np.nan,  # Changed: use min since it's the most negative
+        # The daily aggregates are indexed by sorted date, so the ends of the index are the date range
+        'First Transaction Date': daily.index[0],
+        'Last Transaction Date': daily.index[-1],
     }
 
     # Convert to DataFrame for easy Excel writing
@@ -41,17 +158,9 @@ def create_summary(df):
     return summary_df
 
 
-def create_daily_totals(df):
-    """Create daily totals from the transaction data"""
-    # Convert Transaction Date to datetime if it's not already
-    df['Transaction Date'] = pd.to_datetime(df['Transaction Date'])
-
-    # Create daily totals
-    daily_totals = df.groupby('Transaction Date').agg({
-        'Money In': 'sum',
-        'Money Out': 'sum',
-        'Transaction Details': 'count'  # Count of transactions per day
-    }).reset_index()
+def create_daily_totals(daily):
+    """Create daily totals from the per-day aggregates"""
+    daily_totals = daily.reset_index()
 
     # Calculate net movement for each day (changed: just add Money Out)
     daily_totals['Net Movement'] = daily_totals['Money In'] + daily_totals['Money Out']
@@ -59,25 +168,22 @@ def create_daily_totals(df):
     return daily_totals
 
 
-def create_monthly_totals(df):
-    """Create monthly totals and analysis from the transaction data"""
-    # Convert Transaction Date to datetime if it's not already
-    df['Transaction Date'] = pd.to_datetime(df['Transaction Date'])
-
-    # Add month column for grouping
-    df['Month'] = df['Transaction Date'].dt.strftime('%B %Y')
+def create_monthly_totals(daily):
+    """Create monthly totals and analysis from the per-day aggregates"""
+    # Roll the daily sums and counts up into months, grouping on the numeric
+    # datetime64[M] month rather than on formatted strings
+    months = pd.Index(daily.index.values.astype('datetime64[M]'), name='Month')
+    monthly_totals = daily.groupby(months).sum().reset_index()
 
-    # Calculate monthly totals
-    monthly_totals = df.groupby('Month').agg({
-        'Money In': 'sum',
-        'Money Out': 'sum',
-        'Transaction Details': 'count',
-    }).reset_index()
+    # Label the months only once aggregated, so strftime runs once per month
+    # and the rows stay in calendar order for the growth calculations
+    monthly_totals['Month'] = monthly_totals['Month'].dt.strftime('%B %Y')
 
     # Calculate additional metrics (changed: just add Money Out)
     monthly_totals['Net Movement'] = monthly_totals['Money In'] + monthly_totals['Money Out']
-    # Changed: use absolute values for Money Out in average calculation
-    monthly_totals['Average Transaction Value'] = (monthly_totals['Money In'] + monthly_totals['Money Out'].abs()) / \
+    # Changed: use absolute values for Money Out in average calculation. Money Out
+    # is never positive, so subtracting it is the same as adding its absolute value
+    monthly_totals['Average Transaction Value'] = (monthly_totals['Money In'] - monthly_totals['Money Out']) / \
                                                 monthly_totals['Transaction Details']
 
     # Calculate month-over-month growth
@@ -85,38 +191,137 @@ def create_monthly_totals(df):
     monthly_totals['Money Out Growth %'] = monthly_totals['Money Out'].pct_change() * 100
     monthly_totals['Transaction Count Growth %'] = monthly_totals['Transaction Details'].pct_change() * 100
 
-    # Calculate running totals
-    monthly_totals['Running Total In'] = monthly_totals['Money In'].cumsum()
-    monthly_totals['Running Total Out'] = monthly_totals['Money Out'].cumsum()
-    monthly_totals['Running Net Movement'] = monthly_totals['Running Total In'] + monthly_totals['Running Total Out']  # Changed: just add
-
-    # Calculate grand totals
-    grand_totals = pd.DataFrame([{
+    # Calculate running totals on the underlying arrays, deriving the running
+    # net movement from the two cumulative sums (changed: just add)
+    running_in = np.cumsum(monthly_totals['Money In'].to_numpy())
+    running_out = np.cumsum(monthly_totals['Money Out'].to_numpy())
+    monthly_totals['Running Total In'] = running_in
+    monthly_totals['Running Total Out'] = running_out
+    monthly_totals['Running Net Movement'] = running_in + running_out
+
+    # Calculate grand totals once, reusing them across the grand total row
+    money_in_sum = monthly_totals['Money In'].sum()
+    money_out_sum = monthly_totals['Money Out'].sum()
+    transaction_count = monthly_totals['Transaction Details'].sum()
+    net_movement_sum = monthly_totals['Net Movement'].sum()
+
+    # Append the grand total row in place rather than concatenating a second frame
+    monthly_totals.loc[len(monthly_totals)] = {
         'Month': 'GRAND TOTAL',
-        'Money In': monthly_totals['Money In'].sum(),
-        'Money Out': monthly_totals['Money Out'].sum(),
-        'Transaction Details': monthly_totals['Transaction Details'].sum(),
-        'Net Movement': monthly_totals['Net Movement'].sum(),
+        'Money In': money_in_sum,
+        'Money Out': money_out_sum,
+        'Transaction Details': transaction_count,
+        'Net Movement': net_movement_sum,
         # Changed: use absolute values for Money Out in average calculation
-        'Average Transaction Value': (monthly_totals['Money In'].sum() + monthly_totals['Money Out'].abs().sum()) /
-                                   monthly_totals['Transaction Details'].sum(),
+        'Average Transaction Value': (money_in_sum - money_out_sum) / transaction_count,
         'Money In Growth %': None,
         'Money Out Growth %': None,
         'Transaction Count Growth %': None,
-        'Running Total In': monthly_totals['Money In'].sum(),
-        'Running Total Out': monthly_totals['Money Out'].sum(),
-        'Running Net Movement': monthly_totals['Net Movement'].sum()
-    }])
-
-    # Combine monthly totals with grand total
-    final_monthly_totals = pd.concat([monthly_totals, grand_totals], ignore_index=True)
-
-    return final_monthly_totals
-
+        'Running Total In': money_in_sum,
+        'Running Total Out': money_out_sum,
+        'Running Net Movement': net_movement_sum
+    }
 
-def process_pdf(pdf_path):
-    # Read all tables from all pages
-    tables = tabula.read_pdf(
+    return monthly_totals
+
+
+def parse_amount_codes(codes, offsets, out, valid):
+    """Parse the amounts packed into a byte buffer, flagging any it can't handle"""
+    for i in range(offsets.shape[0] - 1):
+        start = offsets[i]
+        end = offsets[i + 1]
+
+        # Trim surrounding spaces and tabs
+        while start < end and (codes[start] == 32 or codes[start] == 9):
+            start += 1
+        while end > start and (codes[end - 1] == 32 or codes[end - 1] == 9):
+            end -= 1
+
+        negative = False
+        if start < end and (codes[start] == 45 or codes[start] == 43):  # '-' or '+'
+            negative = codes[start] == 45
+            start += 1
+
+        mantissa = 0
+        digits = 0
+        decimals = 0
+        seen_point = False
+        ok = True
+        for j in range(start, end):
+            c = codes[j]
+            if 48 <= c <= 57:
+                mantissa = mantissa * 10 + (c - 48)
+                digits += 1
+                if seen_point:
+                    decimals += 1
+            elif c == 46 and not seen_point:  # '.'
+                seen_point = True
+            elif c == 44 or c == 36:  # ',' or '$'
+                continue
+            else:
+                ok = False
+                break
+
+        # Up to 15 digits the mantissa and power of ten are exact doubles, so a
+        # single division gives the same correctly rounded value as float()
+        if ok and 0 < digits <= 15:
+            value = mantissa / 10.0 ** decimals
+            out[i] = -value if negative else value
+            valid[i] = True
+        else:
+            out[i] = np.nan
+            valid[i] = False
+
+
+if njit is not None:
+    parse_amount_codes = njit(cache=True)(parse_amount_codes)
+
+
+def parse_money_jit(series):
+    """Convert a long column of amounts to floats with the numba parser"""
+    present = series.notna().to_numpy()
+    strings = series[present].astype(str)
+    values = np.full(len(series), np.nan)
+
+    if len(strings):
+        # Pack every amount into one contiguous byte buffer plus row offsets
+        encoded = [value.encode('utf-8') for value in strings]
+        codes = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(value) for value in encoded])
+
+        parsed = np.empty(len(encoded))
+        valid = np.empty(len(encoded), dtype=np.bool_)
+        parse_amount_codes(codes, offsets, parsed, valid)
+        values[present] = parsed
+
+    result = pd.Series(values, index=series.index)
+
+    # Anything the parser doesn't recognise (exponents, stray text) goes
+    # through pandas so the results match parse_money's regular path
+    if len(strings) and not valid.all():
+        unparsed = strings[~valid]
+        result.loc[unparsed.index] = pd.to_numeric(unparsed.str.translate(MONEY_STRIP), errors='coerce')
+
+    return result
+
+
+def parse_money(series):
+    """Convert a column of amounts like '1,234.50' to floats"""
+    if njit is not None and len(series) >= NUMBA_MIN_ROWS:
+        return parse_money_jit(series)
+
+    # str.translate drops the currency symbol and thousands separators in a
+    # single pass, without going through the regex engine
+    return pd.to_numeric(series.astype(str).str.translate(MONEY_STRIP), errors='coerce')
+
+
+def read_tables(pdf_path):
+    """Extract the ruled tables from all pages of the statement"""
+    # A single call for all pages loads the PDF once in Java; each worker
+    # process only ever runs one extraction at a time, so tabula's lazy JVM
+    # start-up is never raced
+    return tabula.read_pdf(
         pdf_path,
         pages='all',
         multiple_tables=True,
@@ -125,84 +330,38 @@ def process_pdf(pdf_path):
         pandas_options={'header': None}
     )
 
-    processed_tables = []
 
-    for table in tables:
-        if len(table.columns) >= 6:
-            table.columns = ['Transaction Date', 'Value Date', 'Transaction Details',
-                           'Money Out', 'Money In', 'Ledger Balance', 'Bank Reference Number']
-
-            table = table.dropna(how='all')
-            table = table[table['Transaction Date'].str.contains(r'\d{2}\.\d{2}\.\d{4}', na=False)]
+def process_pdf(pdf_path):
+    # Combine the transaction tables up front so the cleanup below runs once
+    # over the whole statement rather than once per table
+    tables = [table for table in read_tables(pdf_path) if len(table.columns) >= 6]
 
-            processed_tables.append(table)
+    if tables:
+        final_df = pd.concat(tables, ignore_index=True)
+        final_df.columns = ['Transaction Date', 'Value Date', 'Transaction Details',
+                            'Money Out', 'Money In', 'Ledger Balance', 'Bank Reference Number']
 
-    if processed_tables:
-        final_df = pd.concat(processed_tables, ignore_index=True)
-        final_df = final_df[final_df['Transaction Date'] != 'Transaction Date']
+        # Keep dated transaction rows and drop repeated header rows in one pass
+        # (blank rows fail the date match too, so no separate dropna is needed)
+        dates = final_df['Transaction Date']
+        final_df = final_df[dates.str.contains(DATE_PATTERN, na=False) & (dates != 'Transaction Date')]
 
-        # Sort by transaction date
+        # Sort by transaction date (the aggregators rely on this column already being datetime)
         final_df['Transaction Date'] = pd.to_datetime(final_df['Transaction Date'], format='%d.%m.%Y')
         final_df = final_df.sort_values('Transaction Date')
 
         # Clean up monetary columns
-        for col in ['Money Out', 'Money In', 'Ledger Balance']:
-            final_df[col] = final_df[col].replace('[\$,]', '', regex=True)
-            final_df[col] = pd.to_numeric(final_df[col], errors='coerce')
+        final_df[MONEY_COLUMNS] = final_df[MONEY_COLUMNS].apply(parse_money)
 
         return final_df
 
     return None
 
 
-def apply_excel_formatting(writer, df, summary_df, daily_totals_df, monthly_totals_df):
-    """Apply enhanced Excel formatting to all sheets"""
-    workbook = writer.book
-
-    # Create format objects
-    formats = {
-        'money': workbook.add_format({
-            'num_format': '#,##0.00',
-            'align': 'right'
-        }),
-        'percentage': workbook.add_format({
-            'num_format': '0.0"%"',
-            'align': 'right'
-        }),
-        'date': workbook.add_format({
-            'num_format': 'dd/mm/yyyy',
-            'align': 'center'
-        }),
-        'header': workbook.add_format({
-            'bold': True,
-            'bg_color': '#4F81BD',
-            'font_color': 'white',
-            'border': 1,
-            'align': 'center',
-            'valign': 'vcenter'
-        }),
-        'monthly': workbook.add_format({
-            'bold': True,
-            'bg_color': '#DCE6F1',
-            'border': 1,
-            'num_format': '#,##0.00'
-        }),
-        'grand_total': workbook.add_format({
-            'bold': True,
-            'bg_color': '#4F81BD',
-            'font_color': 'white',
-            'border': 1,
-            'num_format': '#,##0.00'
-        }),
-        'text': workbook.add_format({
-            'align': 'left',
-            'valign': 'vcenter',
-            'text_wrap': True
-        })
-    }
-
+def apply_excel_formatting(worksheets, formats, df, monthly_totals_df):
+    """Apply enhanced Excel formatting to all sheets, before any data is written"""
     # Format Transactions sheet
-    trans_worksheet = writer.sheets['Transactions']
+    trans_worksheet = worksheets['Transactions']
     trans_worksheet.set_column('A:B', 12, formats['date'])
     trans_worksheet.set_column('C:C', 50, formats['text'])
     trans_worksheet.set_column('D:F', 15, formats['money'])
@@ -211,71 +370,150 @@ def apply_excel_formatting(writer, df, summary_df, daily_totals_df, monthly_tota
     trans_worksheet.autofilter(0, 0, len(df), len(df.columns) - 1)
 
     # Format Summary sheet
-    summary_worksheet = writer.sheets['Summary']
+    summary_worksheet = worksheets['Summary']
     summary_worksheet.set_column('A:A', 30, formats['text'])
     summary_worksheet.set_column('B:B', 20, formats['money'])
 
     # Format Daily Totals sheet
-    daily_worksheet = writer.sheets['Daily Totals']
+    daily_worksheet = worksheets['Daily Totals']
     daily_worksheet.set_column('A:A', 12, formats['date'])
     daily_worksheet.set_column('B:E', 15, formats['money'])
     daily_worksheet.freeze_panes(1, 0)
 
     # Format Monthly Analysis sheet
-    monthly_worksheet = writer.sheets['Monthly Analysis']
+    monthly_worksheet = worksheets['Monthly Analysis']
     monthly_worksheet.set_column('A:A', 15, formats['text'])
     monthly_worksheet.set_column('B:F', 15, formats['money'])
     monthly_worksheet.set_column('G:I', 15, formats['percentage'])
     monthly_worksheet.set_column('J:L', 18, formats['money'])
     monthly_worksheet.freeze_panes(1, 0)
 
-    # Add conditional formatting for positive/negative values
-    positive_format = workbook.add_format({'font_color': 'green', 'num_format': '#,##0.00'})
-    negative_format = workbook.add_format({'font_color': 'red', 'num_format': '#,##0.00'})
-
-    # Apply to Net Movement columns
+    # Add conditional formatting for positive/negative values on the Net Movement columns
     daily_worksheet.conditional_format('E2:E1048576', {
         'type': 'cell',
         'criteria': '>',
         'value': 0,
-        'format': positive_format
+        'format': formats['positive']
     })
     daily_worksheet.conditional_format('E2:E1048576', {
         'type': 'cell',
         'criteria': '<',
         'value': 0,
-        'format': negative_format
+        'format': formats['negative']
     })
 
     monthly_worksheet.conditional_format('E2:E1048576', {
         'type': 'cell',
         'criteria': '>',
         'value': 0,
-        'format': positive_format
+        'format': formats['positive']
     })
     monthly_worksheet.conditional_format('E2:E1048576', {
         'type': 'cell',
         'criteria': '<',
         'value': 0,
-        'format': negative_format
+        'format': formats['negative']
     })
 
-    # Write headers
-    for sheet, data in {
+    # Format grand total row in Monthly Analysis (the last data row, below the header)
+    monthly_worksheet.set_row(len(monthly_totals_df), None, formats['grand_total'])
+
+
+def write_sheet(worksheet, data, formats):
+    """Write a DataFrame to a worksheet row by row, starting with the header"""
+    worksheet.write_row(0, 0, list(data.columns), formats['header'])
+
+    for row_num, row in enumerate(data.itertuples(index=False, name=None), start=1):
+        for col_num, value in enumerate(row):
+            # Leave missing values blank so the column and row formats show through
+            if pd.isna(value):
+                continue
+            if isinstance(value, datetime):
+                worksheet.write_datetime(row_num, col_num, value, formats['date'])
+            else:
+                worksheet.write(row_num, col_num, value)
+
+
+def write_report(output, sheets):
+    """Write the report sheets to an Excel file or file-like object"""
+    # constant_memory streams each row to disk as soon as the next one starts
+    # instead of holding the whole workbook in memory. Rows that have been
+    # flushed can't be revisited, so all formatting is set up before the data
+    # and every sheet is written strictly top to bottom. Growth percentages
+    # against a zero month are infinite, which nan_inf_to_errors writes as an
+    # Excel error instead of raising.
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'nan_inf_to_errors': True})
+    formats = {name: workbook.add_format(spec) for name, spec in FORMAT_SPECS.items()}
+    worksheets = {name: workbook.add_worksheet(name) for name in sheets}
+
+    apply_excel_formatting(worksheets, formats, sheets['Transactions'], sheets['Monthly Analysis'])
+
+    for name, data in sheets.items():
+        write_sheet(worksheets[name], data, formats)
+
+    workbook.close()
+
+
+def convert_statement(pdf_path):
+    """Convert a statement PDF into the bytes of the Excel report, or None if no transactions were found"""
+    # Process the PDF
+    df = process_pdf(pdf_path)
+
+    if df is None:
+        return None
+
+    # Create summary and totals
+    daily = aggregate_daily(df)
+    summary_df = create_summary(df, daily)
+    daily_totals_df = create_daily_totals(daily)
+    monthly_totals_df = create_monthly_totals(daily)
+
+    # Format Transaction Date back to string for Excel output
+    df['Transaction Date'] = df['Transaction Date'].dt.strftime('%d.%m.%Y')
+
+    # Write to different sheets, building the workbook in memory rather than
+    # in the uploads folder
+    buffer = io.BytesIO()
+    write_report(buffer, {
         'Transactions': df,
         'Summary': summary_df,
         'Daily Totals': daily_totals_df,
         'Monthly Analysis': monthly_totals_df
-    }.items():
-        worksheet = writer.sheets[sheet]
-        for col_num, value in enumerate(data.columns.values):
-            worksheet.write(0, col_num, value, formats['header'])
-
-    # Format grand total row in Monthly Analysis
-    last_row = len(monthly_totals_df)
-    monthly_worksheet.set_row(last_row - 1, None, formats['grand_total'])
+    })
 
-    return writer
+    return buffer.getvalue()
+
+
+def get_converter(broken=None):
+    """Return the worker pool, starting a new one if there is none or it is the given broken pool"""
+    global converter
+    with converter_lock:
+        if converter is None or converter is broken:
+            if converter is not None:
+                converter.shutdown(wait=False)
+            # Workers are spawned rather than forked from the multi-threaded server
+            converter = ProcessPoolExecutor(max_workers=app.config['CONVERTER_WORKERS'],
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return converter
+
+
+def run_conversion(pdf_path):
+    """Run convert_statement in a worker process and wait for the report"""
+    pool = get_converter()
+    try:
+        future = pool.submit(convert_statement, pdf_path)
+    except BrokenProcessPool:
+        # A worker died during an earlier upload; retry on a fresh pool
+        pool = get_converter(broken=pool)
+        future = pool.submit(convert_statement, pdf_path)
+
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        # The worker died on this statement (e.g. a JVM crash or OOM kill).
+        # This upload fails, but later ones get a fresh pool.
+        get_converter(broken=pool)
+        raise
 
 
 @app.route('/', methods=['GET'])
@@ -297,42 +535,16 @@ def upload_file():
         file.save(pdf_path)
 
         try:
-            # Process the PDF
-            df = process_pdf(pdf_path)
-
-            if df is not None:
-                # Create summary and totals
-                summary_df = create_summary(df)
-                daily_totals_df = create_daily_totals(df)
-                monthly_totals_df = create_monthly_totals(df)
-
-                # Format Transaction Date back to string for Excel output
-                df['Transaction Date'] = df['Transaction Date'].dt.strftime('%d.%m.%Y')
-
-                # Save to Excel
-                excel_filename = f"{filename.rsplit('.', 1)[0]}.xlsx"
-                excel_path = os.path.join(app.config['UPLOAD_FOLDER'], excel_filename)
-
-                # Create Excel writer object
-                writer = pd.ExcelWriter(excel_path, engine='xlsxwriter')
-
-                # Write to different sheets
-                df.to_excel(writer, index=False, sheet_name='Transactions')
-                summary_df.to_excel(writer, index=False, sheet_name='Summary')
-                daily_totals_df.to_excel(writer, index=False, sheet_name='Daily Totals')
-                monthly_totals_df.to_excel(writer, index=False, sheet_name='Monthly Analysis')
-
-                # Apply enhanced formatting
-                writer = apply_excel_formatting(writer, df, summary_df, daily_totals_df, monthly_totals_df)
-
-                # Close the Excel writer
-                writer.close()
+            # Convert in a worker process; the request thread just waits for it
+            report = run_conversion(pdf_path)
 
+            if report is not None:
                 # Clean up PDF file
                 os.remove(pdf_path)
 
-                # Return the Excel file
-                return send_file(excel_path,
+                # Return the Excel file straight from memory
+                excel_filename = f"{filename.rsplit('.', 1)[0]}.xlsx"
+                return send_file(io.BytesIO(report),
                                as_attachment=True,
                                download_name=excel_filename,
                                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')